@@ -1,8 +1,14 @@
 import os
+import io
+import time
+import atexit
+import threading
+import itertools
+from functools import cached_property
+from collections import namedtuple, defaultdict
 from math import pi
-from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash
-from owlready2 import World, get_ontology
+from flask import Flask, render_template, request, redirect, url_for, flash, send_file
+from owlready2 import World, get_ontology, FunctionalProperty, Thing
 
 # ---------------------------
 # Configuration
@@ -12,41 +18,135 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 ONTO_FILE = os.path.join(BASE_DIR, "area_ontology.owl") 
 ONTO_URI = "file://" + ONTO_FILE # Keep for reference
+ONTO_DB = os.path.join(BASE_DIR, "onto.sqlite3") # SQLite quadstore, seeded from ONTO_FILE on first run
+ONTO_EXPORT_NAME = "area_ontology_export.owl" # Download name for the RDF/XML snapshot served by /export
 
 app = Flask(__name__)
 
 app.secret_key = "a-secure-random-key" 
 
+# Attempt-name suffixes: seeded from this process's start time (ms), then strictly increasing
+_ATTEMPT_SEQ = itertools.count(int(time.time() * 1000))
+
 # ---------------------------
 # Ontology Setup and Core Access Helpers
 # -----------------------------------------------------
 
-world = World()
+world = World(filename=ONTO_DB)
 onto = None
 try:
-    # Attempt to load the ontology
-    onto = world.get_ontology(ONTO_FILE).load(format = "rdfxml") 
-    print(f"Ontology loaded successfully from: {ONTO_FILE}")
+    # Reuse the quadstore if a previous run already imported the ontology file
+    stored = [o for iri, o in world.ontologies.items() if iri != "http://anonymous/"]
+    if stored:
+        onto = stored[0].load()
+        print(f"Ontology loaded successfully from: {ONTO_DB}")
+    else:
+        # First run: attempt to load the ontology file and persist it to the quadstore
+        onto = world.get_ontology(ONTO_FILE).load(format = "rdfxml") 
+        world.save()
+        print(f"Ontology loaded successfully from: {ONTO_FILE}")
 except Exception as e:
     # Catch loading errors and stop the app
-    raise RuntimeError(f"FATAL ERROR: Failed to load ontology file at {ONTO_FILE}. Check file path and format (should be RDF/XML/OWL): {e}")
+    raise RuntimeError(f"FATAL ERROR: Failed to load ontology file at {ONTO_FILE} (quadstore: {ONTO_DB}). Check file path and format (should be RDF/XML/OWL): {e}")
+
+# One-time schema migration: these data properties hold a single value, so declare them
+# functional and owlready2 returns a scalar (or None) instead of a list. Must run before
+# any individual is read, since owlready2 caches property values on first access.
+for prop_name in ("correctAnswer", "dimensionName", "dimensionValue"):
+    prop = getattr(onto, prop_name, None)
+    if prop is not None and FunctionalProperty not in prop.is_a:
+        with onto:
+            prop.is_a.append(FunctionalProperty)
+
+# Class handles resolved once at startup (owlready2 namespace lookups are not free)
+_CLASS_CACHE = {}
+for n in ("Problem", "Student", "Attempt", "Dimension", "Shape", "Circle", "Square", "Rectangle", "Triangle"):
+    _CLASS_CACHE[n] = getattr(onto, n, None)
+
+PROBLEM_CLS = _CLASS_CACHE["Problem"]
+STUDENT_CLS = _CLASS_CACHE["Student"]
+ATTEMPT_CLS = _CLASS_CACHE["Attempt"]
+DIMENSION_CLS = _CLASS_CACHE["Dimension"]
+
+# Property names defined by the ontology schema (replaces per-call hasattr probes before writes)
+_PROP_NAMES = frozenset(prop.name for prop in onto.properties())
+
+# Name -> individual index; routes register every individual they create
+_IND_INDEX = {ind.name: ind for ind in onto.individuals()}
+
+# Student name -> [score, num_attempts]; submissions update this, the saver thread writes it back
+_STUDENT_STATS = defaultdict(lambda: [0, 0])
+_DIRTY_STUDENTS = set()
+for st in (STUDENT_CLS.instances() if STUDENT_CLS else ()):
+    score = getattr(st, "studentScore", None)
+    _STUDENT_STATS[st.name] = [score[0] if score else 0, len(getattr(st, "attempts", []))]
+
+def mastery_level(stats):
+    """Fraction of correct attempts for a [score, num_attempts] entry."""
+    return float(stats[0]) / float(max(1, stats[1]))
 
 # Class Access Helper 
 def get_onto_class(class_name):
-    """Safely retrieves a class from the ontology object."""
-    cls = getattr(onto, class_name, None)
+    """Safely retrieves a class from the ontology object (cached handles first)."""
+    cls = _CLASS_CACHE.get(class_name) or getattr(onto, class_name, None)
     if cls is None:
         flash(f"Ontology Class '{class_name}' not found. Check if the class exists and the ontology is loaded.", "danger")
         return None
     return cls
 
-# Save helper
+# Save helper (background writer: requests only mark the ontology dirty)
+SAVE_DEBOUNCE_SECONDS = 0.5
+
+_dirty = threading.Event()
+_stopping = threading.Event()
+_write_lock = threading.Lock() # Serializes every owlready2 write: route create/link blocks and the saver
+
+def _flush_student_stats():
+    """Write changed student scores back to the ontology (caller holds _write_lock)."""
+    for student_name in _DIRTY_STUDENTS:
+        student = _IND_INDEX.get(student_name)
+        if student is None:
+            continue
+        stats = _STUDENT_STATS[student_name]
+        if "studentScore" in _PROP_NAMES:
+            student.studentScore = [stats[0]]
+        if "masteryLevel" in _PROP_NAMES:
+            student.masteryLevel = [mastery_level(stats)]
+    _DIRTY_STUDENTS.clear()
+
+def _write_ontology():
+    """Commit pending changes to the SQLite quadstore (runs on the saver thread)."""
+    with _write_lock:
+        try:
+            _flush_student_stats()
+            world.save()
+        except Exception as e:
+            print(f"ERROR: Failed to save ontology quadstore: {e}")
+
+def _saver_loop():
+    """Coalesce save requests arriving within the debounce window into one write."""
+    while not _stopping.is_set():
+        if not _dirty.wait(timeout=1.0):
+            continue
+        _stopping.wait(SAVE_DEBOUNCE_SECONDS) # debounce, cut short on shutdown
+        _dirty.clear()
+        _write_ontology()
+
 def save_ontology():
-    """Safely saves the ontology to the file."""
-    try:
-        onto.save(file=ONTO_FILE, format="rdfxml") 
-    except Exception as e:
-        flash(f"ERROR: Failed to save ontology file: {e}", "danger")
+    """Schedule a save of the ontology quadstore; returns immediately."""
+    _dirty.set()
+
+def _flush_on_exit():
+    """Stop the saver thread and write any change it did not get to."""
+    _stopping.set()
+    _saver_thread.join(timeout=5)
+    if _dirty.is_set():
+        _dirty.clear()
+        _write_ontology()
+
+_saver_thread = threading.Thread(target=_saver_loop, name="ontology-saver", daemon=True)
+_saver_thread.start()
+atexit.register(_flush_on_exit)
 
 # ---------------------------
 # Utility functions
@@ -55,26 +155,31 @@ def save_ontology():
 def get_individual(short_name):
     """
     Return individual by local name. 
-    FAIL-SAFE 2: Uses iterative search for robustness across formats.
+    FAST PATH: in-memory name index built at startup.
+    FAIL-SAFE: a single exact IRI probe in case the index is stale (e.g. edited store).
     """
+    individual = _IND_INDEX.get(short_name)
+    if individual is not None:
+        return individual
+
     try:
-        # 1. Try the standard search by name 
-        individual = onto.search_one(name = short_name)
-        if individual:
-            return individual
-
-        # 2. Fallback: Iterate through all individuals in the world
-        for individual in list(onto.individuals()):
-            if individual.name == short_name:
-                return individual
-        
-        # 3. Fallback: Search by IRI pattern
-        return onto.search_one(iri="*#" + short_name)
+        individual = onto[short_name]
+        if not isinstance(individual, Thing): # Classes and properties are not individuals
+            return None
+        _IND_INDEX[short_name] = individual
+        return individual
 
     except Exception as e:
         print(f"Error in get_individual for {short_name}: {e}")
         return None
 
+def new_attempt_name(student, problem):
+    """Return an attempt name not used by any individual (owlready2 would silently reuse it)."""
+    while True:
+        att_name = f"Attempt_{student.name}_{problem.name}_{next(_ATTEMPT_SEQ)}"
+        if att_name not in _IND_INDEX and onto[att_name] is None:
+            return att_name
+
 def all_problems():
     """Return list of Problem individuals with error handling."""
     ProblemClass = get_onto_class("Problem")
@@ -97,155 +202,197 @@ def all_students():
             return []
     return []
 
+# Display-only student rows, served from the in-memory score table
+StudentRow = namedtuple("StudentRow", "name score mastery")
+
+def student_row(student):
+    """Snapshot a Student individual as a plain StudentRow for templates."""
+    stats = _STUDENT_STATS.get(student.name, (0, 0))
+    return StudentRow(student.name, stats[0], mastery_level(stats))
+
+# Display-only attempt rows, read straight from the quadstore without building Attempt individuals
+AttemptRow = namedtuple("AttemptRow", "name problem answer correct")
+
+_ATTEMPTS_QUERY_ARGS = (ATTEMPT_CLS, getattr(onto, "attemptOf", None), getattr(onto, "hasAnswer", None), getattr(onto, "isCorrect", None))
+_ATTEMPTS_QUERY = None
+if None not in _ATTEMPTS_QUERY_ARGS:
+    _ATTEMPTS_QUERY = world.prepare_sparql("""
+        SELECT (STR(?a) AS ?attempt) (STR(?p) AS ?problem) ?answer ?correct WHERE {
+            ?a a ??1 .
+            OPTIONAL { ?a ??2 ?p . }
+            OPTIONAL { ?a ??3 ?answer . }
+            OPTIONAL { ?a ??4 ?correct . }
+        }
+    """)
+
+def _local_name(iri):
+    """Return the part of an IRI after the last '#' or '/'."""
+    if not iri:
+        return None
+    return iri.rsplit("#", 1)[-1].rsplit("/", 1)[-1]
+
 def all_attempts():
-    """Return list of Attempt individuals with error handling."""
-    AttemptClass = get_onto_class("Attempt")
-    if AttemptClass:
-        try:
-            return list(AttemptClass.instances())
-        except Exception as e:
-            print(f"Error listing Attempt instances: {e}")
-            return []
-    return []
+    """Return list of AttemptRow tuples with error handling."""
+    if _ATTEMPTS_QUERY is None:
+        get_onto_class("Attempt") # Flashes if the class itself is missing
+        return []
+    try:
+        return [AttemptRow(_local_name(a), _local_name(p), answer, correct)
+                for a, p, answer, correct in _ATTEMPTS_QUERY.execute(_ATTEMPTS_QUERY_ARGS)]
+    except Exception as e:
+        print(f"Error listing Attempt instances: {e}")
+        return []
 
-def dims_for_problem(problem):
+def _dim_float(val):
+    """Convert a raw dimensionValue to float once, at table-build time."""
+    if val is None:
+        return None
+    try:
+        return float(val)
+    except (ValueError, TypeError):
+        return None # Handle non-numeric dimension values
+
+def _dim_entry(name, val):
+    """Build a (display_name, match_key, float_value) row; the key is lowercased once, here."""
+    name = str(name) if name else ""
+    return (name, name.lower(), _dim_float(val))
+
+def _extract_dims_raw(problem):
     
-    # Return list of (dim_name, dim_value) pairs for a Problem individual.
+    # Read (dim_name, lowercase_key, float_value) rows for a Problem individual from the ontology.
     
+    # Each property is read once; getattr(..., None) covers properties the ontology does not define
     dims = []
     try:
-        if hasattr(problem, "hasProblemDimension") and problem.hasProblemDimension:
-            for d in problem.hasProblemDimension:
-                name = d.dimensionName[0] if getattr(d, "dimensionName", None) else ""
-                val = d.dimensionValue[0] if getattr(d, "dimensionValue", None) and isinstance(d.dimensionValue, list) else getattr(d, "dimensionValue", None)
-                
-                # --- FIX 2: Ensure val is a string before being stored in dims list ---
-                if val is not None:
-                    val = str(val) 
-                # ---------------------------------------------------------------------
-
-                dims.append((name, val))
-        elif hasattr(problem, "hasDimension") and problem.hasDimension:
-            for d in problem.hasDimension:
-                name = d.dimensionName[0] if getattr(d, "dimensionName", None) else ""
-                val = d.dimensionValue[0] if getattr(d, "dimensionValue", None) and isinstance(d.dimensionValue, list) else getattr(d, "dimensionValue", None)
-                
-                
-                if val is not None:
-                    val = str(val)
-                # ---------------------------------------------------------------------
-                
-                dims.append((name, val))
+        dim_inds = getattr(problem, "hasProblemDimension", None) or getattr(problem, "hasDimension", None)
+        if dim_inds:
+            for d in dim_inds:
+                dims.append(_dim_entry(getattr(d, "dimensionName", None), getattr(d, "dimensionValue", None)))
         else:
             
-            if getattr(problem, "dimensionValue", None):
-                name = problem.dimensionName[0] if getattr(problem, "dimensionName", None) and isinstance(problem.dimensionName, list) else ""
-                val = problem.dimensionValue[0] if isinstance(problem.dimensionValue, list) else problem.dimensionValue
-                
-                
-                if val is not None:
-                    val = str(val)
-                # ---------------------------------------------------------------------
-
-                dims.append((name, val))
+            val = getattr(problem, "dimensionValue", None)
+            if val is not None:
+                dims.append(_dim_entry(getattr(problem, "dimensionName", None), val))
     except Exception as e:
         print(f"Error processing dimensions for {problem.name}: {e}")
-        flash("Internal error processing problem dimensions.", "danger")
     return dims
 
+# Problem name -> [(dim_name, lowercase_key, float_value), ...], built once; add_problem inserts new rows
+_PROB_DIMS = {p.name: _extract_dims_raw(p) for p in PROBLEM_CLS.instances()} if PROBLEM_CLS else {}
+
+def dims_for_problem(problem):
+    
+    # Return list of (dim_name, dim_value) pairs for a Problem individual.
+    
+    dims = _PROB_DIMS.get(problem.name)
+    if dims is None:
+        dims = _PROB_DIMS[problem.name] = _extract_dims_raw(problem)
+    return dims
+
+# Concrete shape classes keyed by class object, so is_a checks are identity hits
+SHAPE_NAMES = frozenset(("Circle", "Square", "Rectangle", "Triangle"))
+_SHAPE_CLASSES = {_CLASS_CACHE[n]: n for n in SHAPE_NAMES if _CLASS_CACHE.get(n) is not None}
+
 def shape_for_problem(problem):
     
     # Return (shape_class_name, shape_individual) for a problem, or (None, None).
     
    
     try:
-        if not hasattr(problem, "hasShape") or not problem.hasShape:
+        shapes = getattr(problem, "hasShape", None)
+        if not shapes:
             return None, None
-        s = problem.hasShape[0]
+        s = shapes[0]
         
         # 1. Primary Check: Check for specific class types (Triangle, Circle, etc.)
         for c in s.is_a:
-            if hasattr(c, "name"):
-                cname = c.name
-                if cname in ("Circle", "Square", "Rectangle", "Triangle"):
-                    return cname, s
+            cname = _SHAPE_CLASSES.get(c)
+            if cname:
+                return cname, s
         
         # 2. Fallback Check: Use the shape individual's name as a hint 
         # (e.g., if the instance name is 'Triangle_Instance_...')
         if s.name and '_' in s.name:
             # Example: 'Triangle_Instance_Problem_Tri_B3H6' -> 'Triangle'
             name_hint = s.name.split('_')[0]
-            if name_hint in ("Circle", "Square", "Rectangle", "Triangle"):
+            if name_hint in SHAPE_NAMES:
                 return name_hint, s
 
         # 3. Final Fallback: Return the first class name found (might be 'Shape')
         if s.is_a:
             first = s.is_a[0]
-            return (first.name if hasattr(first, "name") else None), s
+            return getattr(first, "name", None), s
         return None, s
     except Exception as e:
         print(f"Error determining shape for {problem.name}: {e}")
         return None, None
 
+# Lowercase dimension-name aliases accepted for each formula variable
+_RADIUS = frozenset({"radius", "r"})
+_SIDE = frozenset({"side", "s"})
+_LEN = frozenset({"length", "l"})
+_WID = frozenset({"width", "w"})
+_BASE = frozenset({"base", "b"})
+_HEIGHT = frozenset({"height", "h"})
+
+def _get_val(dims, targets):
+    """Search dims rows for a key in targets; keys are pre-lowercased and values already floats or None."""
+    # 1. Search by name (most accurate)
+    for _, key, v in dims:
+        if key in targets:
+            return v
+
+    # 2. Fallback: If only one dimension exists, return it (e.g., Circle, Square)
+    if len(dims) == 1:
+        return dims[0][2]
+
+    return None
+
+# Computed answers keyed by problem name (shape/dimensions do not change after creation)
+_ANSWER_CACHE = {}
+
 def compute_answer(problem):
+    """Return the (cached) numeric correct answer for a Problem individual."""
+    key = problem.name
+    if key in _ANSWER_CACHE:
+        return _ANSWER_CACHE[key]
+    val = _compute_answer_impl(problem)
+    _ANSWER_CACHE[key] = val
+    return val
+
+def _compute_answer_impl(problem, _pi=pi, _get_val=_get_val):
     
     # Compute numeric correct answer using shape and dimension values.
+    # (_pi/_get_val are bound as defaults so the hot path uses a local, not a global lookup)
     
     
     shape_name, _ = shape_for_problem(problem)
     dims = dims_for_problem(problem)
 
-    def get_val(names):
-        """Search dims list for matching names (case-insensitive) and convert value safely."""
-        target_names = [x.lower() for x in names] # Create a list of lowercase target names
-        
-        # 1. Search by name (most accurate)
-        for n, v in dims:
-            if n and str(n).lower() in target_names:
-                try:
-                    # Safely convert to float from the string value (v)
-                    return float(v) if v is not None else None
-                except (ValueError, TypeError):
-                    return None # Handle non-numeric dimension values
-        
-        # 2. Fallback: If only one dimension exists, return it (e.g., Circle, Square)
-        if len(dims) == 1:
-            try:
-                # Safely convert the only dimension value
-                return float(dims[0][1]) if dims[0][1] is not None else None
-            except (ValueError, TypeError):
-                return None
-        
-                
-        return None
-
     try:
         if shape_name == "Circle":
-            r = get_val(["radius", "r"])
-            return None if r is None else pi * r * r
+            r = _get_val(dims, _RADIUS)
+            return None if r is None else _pi * r * r
         if shape_name == "Square":
-            s = get_val(["side", "s"])
+            s = _get_val(dims, _SIDE)
             return None if s is None else s * s
         if shape_name == "Rectangle":
-            l = get_val(["length", "l"])
-            w = get_val(["width", "w"])
+            l = _get_val(dims, _LEN)
+            w = _get_val(dims, _WID)
             
             # If explicit name match fails, try the first two dimensions in order (Rectangle specific fallback)
             if l is None or w is None:
-                if len(dims) >= 2 and dims[0][1] is not None and dims[1][1] is not None:
-                    try:
-                        l = float(dims[0][1])
-                        w = float(dims[1][1])
-                    except ValueError:
-                        return None
+                if len(dims) >= 2 and dims[0][2] is not None and dims[1][2] is not None:
+                    l = dims[0][2]
+                    w = dims[1][2]
             
             if l is None or w is None:
                 return None
             return l * w
             
         if shape_name == "Triangle":
-            b = get_val(["base", "b"])
-            h = get_val(["height", "h"])
+            b = _get_val(dims, _BASE)
+            h = _get_val(dims, _HEIGHT)
             if b is None or h is None:
                 return None
             return 0.5 * b * h
@@ -254,13 +401,45 @@ def compute_answer(problem):
         print(f"Error during answer computation for {problem.name}: {e}")
         return None
 
-def approx_equal(a, b, rel_tol=0.02, abs_tol=0.05):
+def approx_equal(a, b, rel_tol=0.02, abs_tol=0.05, _abs=abs, _max=max, _float=float):
     """Compare floats with tolerance (2% or 0.05 default)."""
     try:
-        a = float(a); b = float(b)
+        a = _float(a); b = _float(b)
     except Exception:
         return False
-    return abs(a - b) <= max(abs_tol, rel_tol * abs(b))
+    return _abs(a - b) <= _max(abs_tol, rel_tol * _abs(b))
+
+# Lightweight rows for the problem listing, built once; add_problem appends new ones
+ProblemRow = namedtuple("ProblemRow", "name shape dims answer")
+
+def problem_row(problem):
+    """Snapshot a Problem individual as a plain ProblemRow for templates."""
+    return ProblemRow(problem.name, shape_for_problem(problem)[0], dims_for_problem(problem), compute_answer(problem))
+
+_PROBLEM_ROWS = [problem_row(p) for p in all_problems()]
+
+class ProblemCtx:
+    """Template context for problem.html; each value is computed only when the template reads it."""
+
+    def __init__(self, prob):
+        self.prob = prob
+
+    @cached_property
+    def dims(self):
+        return dims_for_problem(self.prob)
+
+    @cached_property
+    def shape(self):
+        return shape_for_problem(self.prob)[0]
+
+    @cached_property
+    def computed(self):
+        return compute_answer(self.prob)
+
+    @cached_property
+    def stored(self):
+        # FAIL-SAFE: Handle the property being missing (correctAnswer is functional: scalar or None)
+        return getattr(self.prob, "correctAnswer", None)
 
 # ---------------------------
 # Flask routes
@@ -268,8 +447,7 @@ def approx_equal(a, b, rel_tol=0.02, abs_tol=0.05):
 
 @app.route("/")
 def index():
-    problems = all_problems()
-    return render_template("index.html", problems=problems)
+    return render_template("index.html", problems=_PROBLEM_ROWS)
 
 @app.route("/problem/<name>")
 def problem_view(name):
@@ -277,21 +455,8 @@ def problem_view(name):
     if prob is None:
         flash(f"Problem '{name}' not found. Check ontology name/file.", "danger")
         return redirect(url_for("index"))
-        
-    dims = dims_for_problem(prob)
-    shape_name, shape_ind = shape_for_problem(prob)
-    computed = compute_answer(prob)
-    
-    # FAIL-SAFE: Handle properties being missing or not lists
-    stored = None
-    if getattr(prob, "correctAnswer", None):
-        try:
-            stored = prob.correctAnswer[0] if isinstance(prob.correctAnswer, list) else prob.correctAnswer
-        except Exception:
-            stored = None # Could not read stored answer
 
-    return render_template("problem.html", problem=prob, dims=dims, shape_name=shape_name,
-                             computed=computed, stored=stored)
+    return render_template("problem.html", ctx=ProblemCtx(prob))
 
 @app.route("/problem/<name>/submit", methods=["POST"])
 def problem_submit(name):
@@ -315,9 +480,9 @@ def problem_submit(name):
     if correct_val is None:
         # Fallback to stored answer if computation fails
         stored_answer = getattr(prob, "correctAnswer", None)
-        if stored_answer:
+        if stored_answer is not None:
             try:
-                correct_val = float(stored_answer[0] if isinstance(stored_answer, list) else stored_answer)
+                correct_val = float(stored_answer)
             except Exception:
                 # This is the original error point. Should be much less frequent now.
                 flash("Cannot compute or read correct answer for this problem (check dimensions/shape/stored value).", "danger")
@@ -328,57 +493,54 @@ def problem_submit(name):
 
     is_correct = approx_equal(answer_val, correct_val)
 
-    # create/get student (FAIL-SAFE: use helper to get class)
-    StudentClass = get_onto_class("Student")
-    AttemptClass = get_onto_class("Attempt")
+    # create/get student (FAIL-SAFE: classes resolved at startup)
+    StudentClass = STUDENT_CLS or get_onto_class("Student")
+    AttemptClass = ATTEMPT_CLS or get_onto_class("Attempt")
     if StudentClass is None or AttemptClass is None:
         return redirect(url_for("problem_view", name=name)) # Error flashed in helper
 
-    student = get_individual(student_name)
-    try:
-        if student is None:
-            student = StudentClass(student_name)
-            # Initialize lists safely
-            student.studentScore = [0] if not hasattr(student, "studentScore") or student.studentScore is None else student.studentScore
-            student.masteryLevel = [0.0] if not hasattr(student, "masteryLevel") or student.masteryLevel is None else student.masteryLevel
+    # Get-or-create and link under the write lock shared with the saver thread
+    with _write_lock:
+        student = get_individual(student_name)
+        try:
+            if student is None:
+                student = StudentClass(student_name)
+                _IND_INDEX[student.name] = student
+                # Initialize lists safely
+                if "studentScore" in _PROP_NAMES:
+                    student.studentScore = [0]
+                if "masteryLevel" in _PROP_NAMES:
+                    student.masteryLevel = [0.0]
             
-        # create attempt with unique ID
-        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
-        att_name = f"Attempt_{student.name}_{prob.name}_{timestamp}"
-        attempt = AttemptClass(att_name)
-        
-        # Link attempt and set properties (safely)
-        if hasattr(attempt, "attemptOf"):
-            attempt.attemptOf = [prob]
-        if hasattr(attempt, "hasAnswer"):
-            attempt.hasAnswer = [answer_val]
-        if hasattr(attempt, "isCorrect"):
-            attempt.isCorrect = [bool(is_correct)]
-        if hasattr(student, "attempts"):
-            student.attempts.append(attempt)
-
-        # Update student score and mastery (safely)
-        curr_score = student.studentScore[0] if getattr(student, "studentScore", None) else 0
-        
-        # Safely count attempts including the current one
-        num_attempts = len(getattr(student, "attempts", [])) 
-        
-        if is_correct:
-            curr_score += 1
+            # create attempt with unique ID
+            att_name = new_attempt_name(student, prob)
+            attempt = AttemptClass(att_name)
+            _IND_INDEX[att_name] = attempt
         
-        if hasattr(student, "studentScore"):
-            student.studentScore = [curr_score]
-        if hasattr(student, "masteryLevel"):
-            mastery = float(curr_score) / float(max(1, num_attempts))
-            student.masteryLevel = [mastery]
+            # Link attempt and set properties (safely)
+            if "attemptOf" in _PROP_NAMES:
+                attempt.attemptOf = [prob]
+            if "hasAnswer" in _PROP_NAMES:
+                attempt.hasAnswer = [answer_val]
+            if "isCorrect" in _PROP_NAMES:
+                attempt.isCorrect = [bool(is_correct)]
+            if "attempts" in _PROP_NAMES:
+                student.attempts.append(attempt)
+
+            # Update student score and attempt count in memory (written back by the saver thread)
+            stats = _STUDENT_STATS[student.name]
+            stats[1] += 1
+            if is_correct:
+                stats[0] += 1
+            _DIRTY_STUDENTS.add(student.name)
+
+            # store problem.correctAnswer if missing
+            if correct_val is not None and "correctAnswer" in _PROP_NAMES and prob.correctAnswer is None:
+                prob.correctAnswer = float(correct_val)
 
-        # store problem.correctAnswer if missing
-        if getattr(prob, "correctAnswer", None) is None and correct_val is not None and hasattr(prob, "correctAnswer"):
-            prob.correctAnswer = [float(correct_val)]
-
-    except Exception as e:
-        flash(f"ERROR: Failed to create or link student/attempt individuals: {e}", "danger")
-        return redirect(url_for("problem_view", name=name))
+        except Exception as e:
+            flash(f"ERROR: Failed to create or link student/attempt individuals: {e}", "danger")
+            return redirect(url_for("problem_view", name=name))
 
     save_ontology()
 
@@ -391,7 +553,7 @@ def problem_submit(name):
 
 @app.route("/students")
 def students_view():
-    studs = all_students()
+    studs = [student_row(s) for s in all_students()]
     # Assuming 'student.html' is the correct name after your fix
     try:
         return render_template("student.html", students=studs) 
@@ -405,6 +567,20 @@ def attempts_view():
     attempts = all_attempts()
     return render_template("attempts.html", attempts=attempts)
 
+@app.route("/export")
+def export_ontology():
+    """Serialize the current ontology to RDF/XML in memory and download it."""
+    buf = io.BytesIO()
+    try:
+        with _write_lock:
+            _flush_student_stats()
+            onto.save(file=buf, format="rdfxml")
+    except Exception as e:
+        flash(f"ERROR: Failed to export ontology file: {e}", "danger")
+        return redirect(url_for("index"))
+    buf.seek(0)
+    return send_file(buf, mimetype="application/rdf+xml", as_attachment=True, download_name=ONTO_EXPORT_NAME)
+
 @app.route("/add_problem", methods=["GET", "POST"])
 def add_problem():
     """Add a new problem dynamically."""
@@ -418,76 +594,95 @@ def add_problem():
             flash("Provide problem name, shape, and at least the first dimension value.", "warning")
             return redirect(url_for("add_problem"))
 
-        if get_individual(name) is not None:
-            flash("A problem with that name already exists. Pick another unique name.", "warning")
+        # Validate shape and dimension values before creating any individual, so a rejected
+        # form never leaves a half-built problem in the ontology and the name index
+        shape_class = _CLASS_CACHE.get(shape) or getattr(onto, shape, None)
+        if shape_class is None:
+            flash(f"Unknown shape class '{shape}'. Check ontology.", "danger")
             return redirect(url_for("add_problem"))
 
-        # Get necessary classes (FAIL-SAFE: use helper)
-        ProblemClass = get_onto_class("Problem")
-        DimensionClass = get_onto_class("Dimension")
-        if ProblemClass is None or DimensionClass is None:
-             return redirect(url_for("add_problem")) # Error flashed in helper
-
-        # --- Create Individuals ---
+        d2_value = request.form.get("dim2_value", "").strip()
         try:
-            prob = ProblemClass(name)
-            
-            # Create Shape Instance
-            shape_class = getattr(onto, shape, None)
-            if shape_class is None:
-                flash(f"Unknown shape class '{shape}'. Check ontology.", "danger")
+            d1_val = float(d1_value)
+            d2_val = float(d2_value) if d2_value else None
+        except ValueError:
+            flash("ERROR: Dimension values must be valid numbers.", "danger")
+            return redirect(url_for("add_problem"))
+
+        # Check-and-create under the write lock shared with the saver thread
+        with _write_lock:
+            if get_individual(name) is not None:
+                flash("A problem with that name already exists. Pick another unique name.", "warning")
                 return redirect(url_for("add_problem"))
 
-            shape_inst_name = f"{shape}_inst_{name}"
-            shape_inst = shape_class(shape_inst_name)
+            # Get necessary classes (FAIL-SAFE: classes resolved at startup)
+            ProblemClass = PROBLEM_CLS or get_onto_class("Problem")
+            DimensionClass = DIMENSION_CLS or get_onto_class("Dimension")
+            if ProblemClass is None or DimensionClass is None:
+                 return redirect(url_for("add_problem")) # Error flashed in helper
+
+            # --- Create Individuals ---
+            try:
+                prob = ProblemClass(name)
+                _IND_INDEX[name] = prob
+            
+                # Create Shape Instance (shape class validated above)
+                shape_inst_name = f"{shape}_inst_{name}"
+                shape_inst = shape_class(shape_inst_name)
+                _IND_INDEX[shape_inst_name] = shape_inst
             
-            # Link problem -> shape
-            if hasattr(prob, "hasShape"):
-                prob.hasShape = [shape_inst]
-
-            # Dimension 1 Setup
-            d1_name = request.form.get("dim1_name", "").strip()
-            d1_id = f"{name}_dim1"
-            d1 = DimensionClass(d1_id)
-            if hasattr(d1, "dimensionName"):
-                d1.dimensionName = [d1_name or "dim1"]
-            if hasattr(d1, "dimensionValue"):
-                d1.dimensionValue = [float(d1_value)] # Value already validated as non-empty above
-
-            # Link dimension 1
-            if hasattr(prob, "hasProblemDimension"):
-                prob.hasProblemDimension = [d1]
-            elif hasattr(prob, "hasDimension"):
-                prob.hasDimension = [d1]
-
-            # Dimension 2 Setup (if present)
-            d2_value = request.form.get("dim2_value", "").strip()
-            if d2_value:
-                d2_name = request.form.get("dim2_name", "").strip()
-                d2_id = f"{name}_dim2"
-                d2 = DimensionClass(d2_id)
-                if hasattr(d2, "dimensionName"):
-                    d2.dimensionName = [d2_name or "dim2"]
-                if hasattr(d2, "dimensionValue"):
-                    d2.dimensionValue = [float(d2_value)]
+                # Link problem -> shape
+                if "hasShape" in _PROP_NAMES:
+                    prob.hasShape = [shape_inst]
+
+                # Dimension 1 Setup
+                d1_name = request.form.get("dim1_name", "").strip()
+                d1_id = f"{name}_dim1"
+                d1 = DimensionClass(d1_id)
+                _IND_INDEX[d1_id] = d1
+                if "dimensionName" in _PROP_NAMES:
+                    d1.dimensionName = d1_name or "dim1"
+                if "dimensionValue" in _PROP_NAMES:
+                    d1.dimensionValue = d1_val # Value already validated as numeric above
+
+                # Link dimension 1
+                if "hasProblemDimension" in _PROP_NAMES:
+                    prob.hasProblemDimension = [d1]
+                elif "hasDimension" in _PROP_NAMES:
+                    prob.hasDimension = [d1]
+
+                # Dimension 2 Setup (if present)
+                if d2_val is not None:
+                    d2_name = request.form.get("dim2_name", "").strip()
+                    d2_id = f"{name}_dim2"
+                    d2 = DimensionClass(d2_id)
+                    _IND_INDEX[d2_id] = d2
+                    if "dimensionName" in _PROP_NAMES:
+                        d2.dimensionName = d2_name or "dim2"
+                    if "dimensionValue" in _PROP_NAMES:
+                        d2.dimensionValue = d2_val
                 
-                # Link dimension 2
-                if hasattr(prob, "hasProblemDimension"):
-                    prob.hasProblemDimension.append(d2)
-                elif hasattr(prob, "hasDimension"):
-                    prob.hasDimension.append(d2)
-
-            # compute and attach correctAnswer
-            correct_val = compute_answer(prob)
-            if correct_val is not None and hasattr(prob, "correctAnswer"):
-                prob.correctAnswer = [float(correct_val)]
+                    # Link dimension 2
+                    if "hasProblemDimension" in _PROP_NAMES:
+                        prob.hasProblemDimension.append(d2)
+                    elif "hasDimension" in _PROP_NAMES:
+                        prob.hasDimension.append(d2)
+
+                # compute and attach correctAnswer
+                _PROB_DIMS[name] = _extract_dims_raw(prob)
+                _ANSWER_CACHE.pop(name, None)
+                correct_val = compute_answer(prob)
+                if correct_val is not None and "correctAnswer" in _PROP_NAMES:
+                    prob.correctAnswer = float(correct_val)
+
+                _PROBLEM_ROWS.append(problem_row(prob))
             
-        except ValueError:
-            flash("ERROR: Dimension values must be valid numbers.", "danger")
-            return redirect(url_for("add_problem"))
-        except Exception as e:
-            flash(f"ERROR: Failed to create ontology individuals: {e}", "danger")
-            return redirect(url_for("add_problem"))
+            except ValueError:
+                flash("ERROR: Dimension values must be valid numbers.", "danger")
+                return redirect(url_for("add_problem"))
+            except Exception as e:
+                flash(f"ERROR: Failed to create ontology individuals: {e}", "danger")
+                return redirect(url_for("add_problem"))
 
         save_ontology()
         flash(f"Problem {name} created.", "success")
@@ -499,4 +694,6 @@ def add_problem():
 # Run
 # ---------------------------
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    # No reloader: it would import this module in a second process, and both would try
+    # to open the (exclusively locked) SQLite quadstore
+    app.run(debug=True, use_reloader=False)
\ No newline at end of file
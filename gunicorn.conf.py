@@ -0,0 +1,11 @@
+# gunicorn settings for the Area ITS: gunicorn -c gunicorn.conf.py app1:app
+
+# Do not preload: the app opens the SQLite quadstore, builds its in-memory indexes and
+# starts its saver thread at import, and none of that may be shared across fork().
+# The worker imports (and loads the ontology) itself.
+preload_app = False
+
+# Ontology indexes, cached answers and student scores live in process memory, and the
+# process owns the SQLite quadstore connection, so keep a single worker and scale with threads.
+workers = 1
+threads = 4